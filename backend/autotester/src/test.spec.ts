@@ -22,6 +22,14 @@ describe("Task 1", () => {
       const response = await getTask1("");
       expect(response.status).toBe(400);
     });
+
+    it("squashes whitespace", async () => {
+      const response = await getTask1("Skibidi   spaghetti");
+      expect(response.body).toStrictEqual({ msg: "Skibidi Spaghetti" });
+
+      const response2 = await getTask1("Skibidi___Spaghetti  ");
+      expect(response2.body).toStrictEqual({ msg: "Skibidi Spaghetti" });
+    });
   });
 });
 
@@ -62,6 +70,15 @@ describe("Task 2", () => {
       expect(resp.status).toBe(400);
     });
 
+    it("Raw ingredients", async () => {
+      const resp = await putTask2({
+        type: "ingredient",
+        name: "Raw Lettuce",
+        cookTime: 0,
+      });
+      expect(resp.status).toBe(200);
+    });
+
     it("Congratulations u burnt the pan pt3", async () => {
       const resp = await putTask2({
         type: "pan",
@@ -157,5 +174,208 @@ describe("Task 3", () => {
       const resp3 = await getTask3("Skibidi");
       expect(resp3.status).toBe(200);
     });
+
+    it("Skibidi Spaghetti", async () => {
+      // the README example, with the names prefixed so they don't clash with earlier tests
+      const entries = [
+        {
+          type: "recipe",
+          name: "Skibidi Spaghetti",
+          requiredItems: [
+            { name: "Spaghetti Meatball", quantity: 3 },
+            { name: "Spaghetti Pasta", quantity: 1 },
+            { name: "Spaghetti Tomato", quantity: 2 },
+          ],
+        },
+        {
+          type: "recipe",
+          name: "Spaghetti Meatball",
+          requiredItems: [
+            { name: "Spaghetti Beef", quantity: 2 },
+            { name: "Spaghetti Egg", quantity: 1 },
+          ],
+        },
+        {
+          type: "recipe",
+          name: "Spaghetti Pasta",
+          requiredItems: [
+            { name: "Spaghetti Flour", quantity: 3 },
+            { name: "Spaghetti Egg", quantity: 1 },
+          ],
+        },
+        { type: "ingredient", name: "Spaghetti Beef", cookTime: 5 },
+        { type: "ingredient", name: "Spaghetti Egg", cookTime: 3 },
+        { type: "ingredient", name: "Spaghetti Flour", cookTime: 0 },
+        { type: "ingredient", name: "Spaghetti Tomato", cookTime: 2 },
+      ];
+      for (const entry of entries) {
+        const resp = await postEntry(entry);
+        expect(resp.status).toBe(200);
+      }
+
+      const resp = await getTask3("Skibidi Spaghetti");
+      expect(resp.status).toBe(200);
+      expect(resp.body.name).toBe("Skibidi Spaghetti");
+      expect(resp.body.cookTime).toBe(46);
+
+      // ingredients can come back in any order
+      const byName = (a, b) => a.name.localeCompare(b.name);
+      expect([...resp.body.ingredients].sort(byName)).toStrictEqual(
+        [
+          { name: "Spaghetti Beef", quantity: 6 },
+          { name: "Spaghetti Flour", quantity: 3 },
+          { name: "Spaghetti Egg", quantity: 4 },
+          { name: "Spaghetti Tomato", quantity: 2 },
+        ].sort(byName)
+      );
+    });
+
+    it("Cook time past 64 bits", async () => {
+      const resp1 = await postEntry({
+        type: "ingredient",
+        name: "Big Beef",
+        cookTime: 2 ** 62,
+      });
+      expect(resp1.status).toBe(200);
+
+      const resp2 = await postEntry({
+        type: "recipe",
+        name: "Big Roast",
+        requiredItems: [{ name: "Big Beef", quantity: 8 }],
+      });
+      expect(resp2.status).toBe(200);
+
+      const resp3 = await getTask3("Big Roast");
+      expect(resp3.status).toBe(200);
+      expect(resp3.body.cookTime).toBe(2 ** 65);
+    });
+  });
+});
+
+// Extra behaviour from the python template, see "Extras" in the README. These aren't part of the
+// tasks, so they sit outside the Task blocks and aren't picked up by test_part1/2/3
+describe("Extras", () => {
+  describe("POST /entry loops", () => {
+    const postEntry = async (data) => {
+      return await request("http://localhost:8080").post("/entry").send(data);
+    };
+
+    it("Recipes can't require themselves", async () => {
+      const resp1 = await postEntry({
+        type: "recipe",
+        name: "Loop A",
+        requiredItems: [{ name: "Loop B", quantity: 1 }],
+      });
+      expect(resp1.status).toBe(200);
+
+      const resp2 = await postEntry({
+        type: "recipe",
+        name: "Loop B",
+        requiredItems: [{ name: "Loop A", quantity: 1 }],
+      });
+      expect(resp2.status).toBe(400);
+    });
+  });
+
+  describe("POST /entries", () => {
+    const postEntries = async (data) => {
+      return await request("http://localhost:8080").post("/entries").send(data);
+    };
+
+    it("Mixed batch", async () => {
+      const resp = await postEntries({
+        entries: [
+          { type: "ingredient", name: "Batch Flour", cookTime: 1 },
+          { type: "ingredient", name: "Batch Flour", cookTime: 2 },
+          ["not", "an", "entry"],
+          {
+            type: "recipe",
+            name: "Batch Bread",
+            requiredItems: [{ name: "Batch Flour", quantity: 2 }],
+          },
+        ],
+      });
+      expect(resp.status).toBe(200);
+      expect(resp.body.results.map((result) => result.status)).toStrictEqual([
+        200, 400, 400, 200,
+      ]);
+    });
+
+    it("Entries must be a list", async () => {
+      const resp = await postEntries({
+        entries: { type: "ingredient", name: "Batch Salt", cookTime: 1 },
+      });
+      expect(resp.status).toBe(400);
+    });
+  });
+
+  describe("/summaries", () => {
+    const postEntry = async (data) => {
+      return await request("http://localhost:8080").post("/entry").send(data);
+    };
+
+    it("GET with repeated names", async () => {
+      const resp1 = await postEntry({
+        type: "ingredient",
+        name: "Summary Rice",
+        cookTime: 3,
+      });
+      expect(resp1.status).toBe(200);
+
+      const resp2 = await postEntry({
+        type: "recipe",
+        name: "Summary Sushi",
+        requiredItems: [{ name: "Summary Rice", quantity: 2 }],
+      });
+      expect(resp2.status).toBe(200);
+
+      const resp3 = await request("http://localhost:8080")
+        .get("/summaries")
+        .query("name=Summary%20Sushi&name=Summary%20Rice&name=nothing");
+      expect(resp3.status).toBe(200);
+      expect(resp3.body.results.map((result) => result.status)).toStrictEqual([
+        200, 400, 400,
+      ]);
+      expect(resp3.body.results[0].body).toStrictEqual({
+        name: "Summary Sushi",
+        cookTime: 6,
+        ingredients: [{ name: "Summary Rice", quantity: 2 }],
+      });
+    });
+
+    it("POST with a non-string name", async () => {
+      const resp = await request("http://localhost:8080")
+        .post("/summaries")
+        .send({ names: [["Summary Sushi"], "Summary Sushi"] });
+      expect(resp.status).toBe(200);
+      expect(resp.body.results.map((result) => result.status)).toStrictEqual([
+        400, 200,
+      ]);
+    });
+
+    it("Cook time past 64 bits", async () => {
+      const resp1 = await postEntry({
+        type: "ingredient",
+        name: "Summary Big Beef",
+        cookTime: 2 ** 62,
+      });
+      expect(resp1.status).toBe(200);
+
+      const resp2 = await postEntry({
+        type: "recipe",
+        name: "Summary Big Roast",
+        requiredItems: [{ name: "Summary Big Beef", quantity: 8 }],
+      });
+      expect(resp2.status).toBe(200);
+
+      const resp3 = await request("http://localhost:8080")
+        .post("/summaries")
+        .send({ names: ["Summary Big Roast", "nothing"] });
+      expect(resp3.status).toBe(200);
+      expect(resp3.body.results.map((result) => result.status)).toStrictEqual([
+        200, 400,
+      ]);
+      expect(resp3.body.results[0].body.cookTime).toBe(2 ** 65);
+    });
   });
 });
@@ -1,25 +1,41 @@
-from dataclasses import dataclass
-from typing import List, Dict, Union
-from flask import Flask, request, jsonify
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache
+import threading
+from typing import Annotated, List, Tuple, Union
+from flask import Flask, Response, request
+import json
+import msgspec
+import orjson
+import os
 import re
 
 # ==== Type Definitions, feel free to add or modify ===========================
-@dataclass
-class CookbookEntry:
-	name: str
+# these are msgspec structs so incoming entries are parsed and validated against them in one go.
+# fields are snake_case here and camelCase in the json, and the json 'type' field picks the struct.
+# they're frozen because the rest of the file relies on an entry never changing once it's added
+Name = Annotated[str, msgspec.Meta(min_length=1)]
 
-@dataclass
-class RequiredItem():
-	name: str
-	quantity: int
+class CookbookEntry(msgspec.Struct, frozen=True, tag_field='type', rename='camel'):
+	name: Name
 
-@dataclass
-class Recipe(CookbookEntry):
-	required_items: List[RequiredItem]
+class RequiredItem(msgspec.Struct, frozen=True):
+	name: Name
+	# quantity must be a positive integer
+	quantity: Annotated[int, msgspec.Meta(gt=0)]
 
-@dataclass
-class Ingredient(CookbookEntry):
-	cook_time: int
+class Recipe(CookbookEntry, tag='recipe'):
+	required_items: Annotated[Tuple[RequiredItem, ...], msgspec.Meta(min_length=1)]
+
+	def __post_init__(self):
+		# cant have repeated items in the same entry. just have one item with a higher quantity
+		if len({item.name for item in self.required_items}) != len(self.required_items):
+			raise ValueError('requiredItems can only have one element per name')
+
+class Ingredient(CookbookEntry, tag='ingredient'):
+	# cannot time travel
+	cook_time: Annotated[int, msgspec.Meta(ge=0)]
+
+Entry = Union[Recipe, Ingredient]
 
 
 # =============================================================================
@@ -30,25 +46,66 @@ app = Flask(__name__)
 # Store your recipes here!
 cookbook = {}
 
+# requests can be handled on several threads at once (see wsgi.py). the cookbook is never changed
+# in place, adding an entry builds a new dict and swaps it in, so summaries can read whatever
+# cookbook they grabbed without locking. only adding entries holds this lock
+cookbookLock = threading.Lock()
+
+# orjson is a lot quicker than the stdlib json that flask uses, which matters for big summaries.
+# it can't encode ints wider than 64 bits though, and summary cookTimes and quantities are products
+# along the whole recipe so they can get that big. the stdlib handles those just fine
+def dumpJson(obj):
+	try:
+		return orjson.dumps(obj)
+	except TypeError:
+		return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+def jsonResponse(obj):
+	return Response(dumpJson(obj), mimetype='application/json')
+
+# reads the request body with orjson, or returns None if it isn't valid json
+def readJson():
+	try:
+		return orjson.loads(request.get_data())
+	except orjson.JSONDecodeError:
+		return None
+
 # Task 1 helper (don't touch)
 @app.route("/parse", methods=['POST'])
 def parse():
-	data = request.get_json()
+	data = readJson()
+	if data.__class__ is not dict:
+		return 'Invalid request body', 400
 	recipe_name = data.get('input', '')
+	if recipe_name.__class__ is not str:
+		return 'Invalid recipe name', 400
 	parsed_name = parse_handwriting(recipe_name)
 	if parsed_name is None:
 		return 'Invalid recipe name', 400
-	return jsonify({'msg': parsed_name}), 200
+	return jsonResponse({'msg': parsed_name}), 200
 
 # [TASK 1] ====================================================================
 # Takes in a recipeName and returns it in a form that 
+
+# hyphens and underscores become spaces and anything else that isn't an ascii letter or a
+# space gets deleted, all in a single translate pass instead of a handful of regex passes
+_HANDWRITING_TRANS = str.maketrans({
+	'-': ' ',
+	'_': ' ',
+	**{c: None for c in map(chr, range(256)) if not (c.isascii() and c.isalpha()) and c not in ' -_'},
+})
+_NON_LETTER = re.compile('[^A-Za-z ]')
+
+# parsing is pure and the same handwriting tends to come in over and over, so remember the results
+@lru_cache(maxsize=4096)
 def parse_handwriting(recipeName: str) -> Union[str | None]:
-	recipeName = re.sub('-', ' ', recipeName)
-	recipeName = re.sub('_', ' ', recipeName)
-	recipeName = re.sub('[^A-Za-z ]', '', recipeName)
-	recipeName = recipeName.title()
-	recipeName = recipeName.strip()
-	recipeName = re.sub('  ', ' ', recipeName)
+	recipeName = recipeName.translate(_HANDWRITING_TRANS)
+	if not recipeName.isascii():
+		# the table only covers the first 256 characters, anything past that is stripped here
+		recipeName = _NON_LETTER.sub('', recipeName)
+
+	# split() with no args trims both ends and squashes any run of whitespace, not just doubles
+	recipeName = ' '.join(recipeName.title().split())
 
 	return recipeName if len(recipeName) > 0 else None
 
@@ -56,190 +113,316 @@ def parse_handwriting(recipeName: str) -> Union[str | None]:
 # [TASK 2] ====================================================================
 # Endpoint that adds a CookbookEntry to your magical cookbook
 
-def isRecipeValid(entry):
-	requiredItems = entry.get('requiredItems')
-
-	# all recipes must have requiredItems of type list
-	if not requiredItems or type(requiredItems) != list:
-		return False
-	
-	# keep track of the names of items that have been seen
-	nameSet = set()
-
-	# requiredItems is iterable because it's a list
-	for item in requiredItems:
-		# each item must have name as a str
-		name = item.get('name')
-		if not name or type(name) != str:
-			return False 
-
-		elif name in nameSet:
-			# cant have repeated items in the same entry. just have one item with a higher quantity
-			return False
-		
-		# each item must have quantity as an int
-		quantity = item.get('quantity')
-		if not quantity or type(quantity) != int:
-			return False
-
-		elif quantity <= 0:
-			# quantity must be a positive integer
-			return False
-
-		# add to nameSet to keep track of existing names
-		nameSet.add(name)
-
-	# if all items are valid then the recipe is also valid
-	return True
-
-def isIngredientValid(entry):
-	# this function is much simpler as there are fewer chekcs
-	cookTime = entry.get('cookTime')
-	if not cookTime or type(cookTime) != int:
-		return False
-
-	elif cookTime < 0:
-		# cannot time travel
-		return False
-
-	return True
+# HELLO! this was written with some additional assumptions, to hopefully avoid human error
+# from whoever is making the post request. this could include quantity having to be a +ve int only,
+# or no repeated requiredItems in a given entry (cake entry can't have 1 egg and 1 more egg).
+# all of that lives on the structs up top now, and extra keys are ignored in case more get added later
+
+# checks whether adding a recipe called entryName would make it require itself, by walking down from
+# its requiredItems through whatever is already in cb. entries never change once added, so
+# catching loops here means the cookbook can never contain one and expandItem doesn't have to check
+def wouldLoop(entryName, requiredItems, cb):
+	seen = set()
+	queue = deque(item.name for item in requiredItems)
+
+	while queue:
+		name = queue.popleft()
+		if name == entryName:
+			return True
+
+		elif name in seen:
+			continue
+
+		seen.add(name)
+		entry = cb.get(name)
+		# items that aren't in the cookbook yet can't lead anywhere
+		if entry.__class__ is Recipe:
+			queue.extend(item.name for item in entry.required_items)
+
+	return False
+
+# checks whether an already validated entry can go into cb, returning an error message or None
+def checkEntry(entry, cb):
+	entryName = entry.name
+	if entryName in cb:
+		# don't allow adding an entry already present in the cookbook
+		return 'entry already exists in cookbook'
+
+	elif entry.__class__ is Recipe and wouldLoop(entryName, entry.required_items, cb):
+		# a recipe can't (eventually) require itself, it would never finish cooking
+		return 'recipe requires itself'
+
+	return None
+
+# adds already validated entries to the cookbook in order, returning a (body, status) pair for each.
+# the whole lot goes into one copy of the cookbook under a single hold of the lock, and that copy is
+# swapped in once at the end, so a batch costs one copy rather than one per entry. later entries are
+# checked against the earlier ones, so duplicates and loops within the batch are caught too.
+# the caches don't need touching, they only hold recipes that expanded fine, and a new entry can't
+# change how those expand
+def storeEntries(entries):
+	global cookbook
+
+	results = []
+	with cookbookLock:
+		cb = cookbook
+		copied = False
+
+		for entry in entries:
+			error = checkEntry(entry, cb)
+			if error is not None:
+				results.append((error, 400))
+				continue
+
+			if not copied:
+				# readers may be using the current cookbook, so never change it in place
+				cb = dict(cb)
+				copied = True
+
+			cb[entry.name] = entry
+			results.append(('success', 200))
+
+		if copied:
+			cookbook = cb
+
+	return results
+
+# adds one already validated entry to the cookbook, returning a (body, status) pair for the response
+def storeEntry(entry):
+	return storeEntries([entry])[0]
+
+# parses and validates one raw json entry, returning (entry, error). /entry and /entries both go
+# through here so they accept exactly the same entries
+def decodeEntry(raw):
+	try:
+		return msgspec.json.decode(raw, type=Entry), None
+	except msgspec.DecodeError as e:
+		# this covers both invalid json and json that doesn't match an Entry
+		return None, str(e)
+
+# the same /entry body tends to get sent over and over (retries, load tests), so remember the parsed
+# entry and its validation error for recent raw bodies and skip straight to storeEntry on a repeat.
+# the body bytes themselves are the key so two different bodies can never share a verdict, and only
+# small bodies are kept so the cache stays under ENTRY_CACHE_SIZE * ENTRY_CACHE_MAX_BODY bytes
+ENTRY_CACHE_SIZE = 1024
+ENTRY_CACHE_MAX_BODY = 4096
+_entryCache = OrderedDict()
+_entryCacheLock = threading.Lock()
+
+# parses and validates the /entry body, returning (entry, error)
+def readEntry():
+	raw = request.get_data()
+	if len(raw) > ENTRY_CACHE_MAX_BODY:
+		return decodeEntry(raw)
+
+	with _entryCacheLock:
+		cached = _entryCache.get(raw)
+		if cached is not None:
+			_entryCache.move_to_end(raw)
+			return cached
+
+	result = decodeEntry(raw)
+
+	with _entryCacheLock:
+		_entryCache[raw] = result
+		if len(_entryCache) > ENTRY_CACHE_SIZE:
+			# drop the least recently used body
+			_entryCache.popitem(last=False)
+
+	return result
 
 @app.route('/entry', methods=['POST'])
 def create_entry():
-	# HELLO! this was written with some additional assumptions, to hopefully avoid human error
-	# from whoever is making the post request. this could include quantity having to be a +ve int only,
-	# or no repeated requiredItems in a given entry (cake entry can't have 1 egg and 1 more egg)
-	entry = request.json
+	entry, error = readEntry()
+	if error is not None:
+		return error, 400
 
-	# every entry must have a name
-	entryName = entry.get('name')
-	if not entryName:
-		return 'name not found', 400
+	return storeEntry(entry)
 
-	elif type(entryName) != str:
-		# name must be a str
-		return 'name must be a str', 400
+# the /entries body. each entry is left as raw json for decodeEntry to decode on its own, so a bad
+# entry only fails itself and numbers are read the same way as on /entry
+class EntryBatch(msgspec.Struct):
+	entries: List[msgspec.Raw]
 
-	elif entryName in cookbook:
-		# don't allow adding an entry already present in the cookbook
-		return 'entry already exists in cookbook', 400
-
-	# every entry must have a type
-	entryType = entry.get('type')
-	if not entryType:
-		return 'type not found', 400
-	
-	elif type(entryType) != str:
-		# type must be a str
-		return 'type must be a str', 400
-
-	# depending on entryType, handle additional fields
-	if entryType == 'recipe':
-		if not isRecipeValid(entry):
-			return 'invalid recipe', 400
-
-	elif entryType == 'ingredient': 
-		if not isIngredientValid(entry):
-			return 'invalid ingredient', 400
+# batch version of /entry, takes {"entries": [...]} and adds them in order. each entry gets its own
+# {status, body} result so one bad entry doesn't stop the rest, just like sending them one by one
+@app.route('/entries', methods=['POST'])
+def create_entries():
+	try:
+		batch = msgspec.json.decode(request.get_data(), type=EntryBatch)
+	except msgspec.DecodeError as e:
+		return str(e), 400
 
-	else:
-		return 'invalid type', 400
+	decoded = [decodeEntry(raw) for raw in batch.entries]
+	stored = iter(storeEntries([entry for entry, error in decoded if error is None]))
 
-	# add to cookbook
-	cookbook[entryName] = entry
+	results = []
+	for entry, error in decoded:
+		body, status = (error, 400) if error is not None else next(stored)
+		results.append({'status': status, 'body': body})
 
-	# technically i could also check if any other keys exist but aren't supposed to be there
-	# but i choose not to do this because maybe other keys will be added in the future (potentially)
-	
-	return 'success', 200
+	return jsonResponse({'results': results}), 200
 
 
 # [TASK 3] ====================================================================
 # Endpoint that returns a summary of a recipe that corresponds to a query name
 
-# handle a requiredItem with this function to calculate cookTime and gather an ingredient list
-# returns totalCookTime and ingredients list
-def handleItemInfo(name, quantity):
-	if name not in cookbook:
-		# i guess the easiest way to handle invalid names here is to raise an error and let the 
-		# parent function handle check for it
-		raise ValueError('recipe name not found in cookbook')
-	
-	# if found in the cookbook then great, handle it
-	entry = cookbook[name]
-
-	# handle ingredient (easy part)
-	if entry['type'] == 'ingredient':
-		totalCookTime = entry['cookTime'] * quantity
-		return totalCookTime, {name: quantity}
-
-	# expect that if the entry is not an ingredient then it must be a recipe
-	# if a new type is added then tests added in the future should fail here
-	if entry['type'] != 'recipe':
-		raise ValueError("what? there's a new entry type and you forgot to handle it here..")
-
-	# handle recipe recursively
-	totalCookTime = 0
-	ingredients = {}
-
-	for item in entry.get('requiredItems', []):
-		itemName = item['name']
-		itemQuantity = item['quantity'] * quantity
-
-		# recursion here is fine because we don't expect there to be hundreds or thousands of nested
-		# recipes in any given recipe. if this is expected to scale then an iterative solution with
-		# a queue might be better here, but for right now practically a recipe should be fine to recurse.
-
-		# further, there could be a case where loops could occur. i guess i can assume that recipes
-		# would not have loops, but if i was writing a more rigorous app prone to human error, then
-		# i would want to check that we don't recurse items that have already been seen, to prevent
-		# infinite loops
-
-		# any errors here would propogate to parent function
-		itemCookTime, itemIngredients = handleItemInfo(itemName, itemQuantity)
-
-		# add subrecipe's cooktime and ingredients to the result
-		totalCookTime += itemCookTime
-		for itemIngredientName, itemIngredientQuantity in itemIngredients.items():
-			# add to ingredients dict
-			ingredients[itemIngredientName] = ingredients.get(itemIngredientName, 0) + itemIngredientQuantity
-		
-		return totalCookTime, ingredients
-
-@app.route('/summary', methods=['GET'])
-def summary():
-	name = request.args['name']
-
-	if name not in cookbook:
+# expanded recipes are remembered here as name -> (cookTime, ingredients) for a quantity of 1, so a
+# sub-recipe that shows up under lots of parents (think dough) only ever gets expanded once.
+# expandItem raises before remembering anything that fails, and entries never change or go away,
+# so whatever is in here stays right for every later cookbook and is kept across new entries
+_expansions = {}
+
+# expand a recipe in cb into its total cookTime and base ingredients for a quantity of 1, using
+# memo to remember expansions. this walks the recipe with an explicit stack rather than recursing,
+# so a deep recipe can't hit the recursion limit. storeEntry never lets a loop into the cookbook so
+# there's no need to look for one
+def expandItem(name, cb, memo):
+	if name in memo:
+		return memo[name]
+
+	# only recipes ever go on the stack, base ingredients are added straight into their parent
+	stack = [name]
+
+	while stack:
+		itemName = stack[-1]
+		if itemName in memo:
+			# already expanded, possibly from being pushed by more than one parent
+			stack.pop()
+			continue
+
+		requiredItems = cb[itemName].required_items
+		pending = []
+		for item in requiredItems:
+			child = cb.get(item.name)
+			if child is None:
+				# i guess the easiest way to handle invalid names here is to raise an error and let the 
+				# parent function handle check for it
+				raise ValueError('recipe name not found in cookbook')
+
+			elif child.__class__ is Recipe:
+				if item.name not in memo:
+					pending.append(item.name)
+
+			elif child.__class__ is not Ingredient:
+				# if a new type is added then tests added in the future should fail here
+				raise ValueError("what? there's a new entry type and you forgot to handle it here..")
+
+		if pending:
+			stack.extend(pending)
+			continue
+
+		# every sub-recipe is expanded by now, so scale everything up and add it together
+		totalCookTime = 0
+		ingredients = Counter()
+		for item in requiredItems:
+			child = cb[item.name]
+			itemQuantity = item.quantity
+
+			if child.__class__ is Ingredient:
+				# handle ingredient (easy part), no need to build a Counter just for this one
+				totalCookTime += child.cook_time * itemQuantity
+				ingredients[item.name] += itemQuantity
+				continue
+
+			itemCookTime, itemIngredients = memo[item.name]
+			totalCookTime += itemCookTime * itemQuantity
+			ingredients.update({
+				ingredientName: ingredientQuantity * itemQuantity
+				for ingredientName, ingredientQuantity in itemIngredients.items()
+			})
+
+		memo[itemName] = totalCookTime, ingredients
+		stack.pop()
+
+	return memo[name]
+
+# finished summaries by recipe name, so asking for the same recipe again is just a dict lookup.
+# only successful summaries go in here (so random names can't grow it forever), and like
+# _expansions it's kept across new entries
+_summaries = {}
+
+# builds the summary of a recipe from cb, returning a (body, status) pair for the response
+def buildSummary(name, cb, memo):
+	recipe = cb.get(name)
+	if recipe is None:
 		# check if this recipe exists in the cookbook
 		return 'recipe not found in cookbook', 400
 
-	elif cookbook[name]['type'] != 'recipe':
+	elif recipe.__class__ is not Recipe:
 		# the given name must be a recipe in the cookbook
 		return 'given name is not a recipe in the cookbook', 400
 
-	recipe = cookbook[name]
-	totalCookTime = 0
-	ingredients = {}
-
-	# recurse through the recipe
+	# expand the recipe down to its base ingredients
 	try:
-		totalCookTime, ingredients = handleItemInfo(name, 1)
+		totalCookTime, ingredients = expandItem(name, cb, memo)
 	except Exception as e:
 		return str(e), 400
 
 	# map the ingredients to the correct output format
-	ingredientList = []
-	for ingredientName, ingredientQuantity in ingredients.items():
-		ingredientList.append({'name': ingredientName, 'quantity': ingredientQuantity})
-
-	result = jsonify({
+	ingredientList = [
+		{'name': ingredientName, 'quantity': ingredientQuantity}
+		for ingredientName, ingredientQuantity in ingredients.items()
+	]
+
+	# encode the summary to json once here rather than on every request that gets it from _summaries.
+	# orjson writes a Fragment out as-is, both as a whole /summary response and inside /summaries
+	return orjson.Fragment(dumpJson({
 		'name': name,
 		'cookTime': totalCookTime,
 		'ingredients': ingredientList
-	})
+	})), 200
+
+# returns the (body, status) summary of a recipe, from _summaries if it's there.
+# shared by /summary and /summaries
+def summariseRecipe(name):
+	cached = _summaries.get(name)
+	if cached is not None:
+		return cached
+
+	# hold on to the current cookbook for the whole summary, a concurrent storeEntry swaps in a new
+	# one rather than changing this one
+	result = buildSummary(name, cookbook, _expansions)
+	if result[1] == 200:
+		_summaries[name] = result
+
+	return result
+
+@app.route('/summary', methods=['GET'])
+def summary():
+	name = request.args['name']
+
+	body, status = summariseRecipe(name)
+	if status != 200:
+		return body, status
+
+	return jsonResponse(body), 200
+
+# batch version of /summary. names come from repeated query args (?name=a&name=b) on a GET,
+# or from {"names": [...]} on a POST, and each one gets its own {status, body} result
+@app.route('/summaries', methods=['GET', 'POST'])
+def summaries():
+	if request.method == 'GET':
+		names = request.args.getlist('name')
+	else:
+		data = readJson()
+		if data.__class__ is not dict:
+			return 'body must be an object', 400
+
+		names = data.get('names')
+		if names.__class__ is not list:
+			return 'names must be a list', 400
+
+	results = []
+	for name in names:
+		if name.__class__ is not str:
+			results.append({'status': 400, 'body': 'name must be a str'})
+			continue
+
+		body, status = summariseRecipe(name)
+		results.append({'status': status, 'body': body})
 
-	return result, 200
+	return jsonResponse({'results': results}), 200
 
 
 # =============================================================================
@@ -247,4 +430,6 @@ def summary():
 # =============================================================================
 
 if __name__ == '__main__':
-	app.run(debug=True, port=8080)
+	# the debugger and reloader slow every request down, so they're only on with FLASK_DEBUG=1.
+	# for anything more than local testing, serve wsgi.py with gunicorn instead
+	app.run(debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True, port=8080)
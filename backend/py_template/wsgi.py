@@ -0,0 +1,9 @@
+# entry point for serving the cookbook with a production WSGI server instead of flask's dev server:
+#
+#   gunicorn --workers 1 --worker-class gthread --threads 8 --bind 0.0.0.0:8080 wsgi:app
+#
+# the cookbook only lives in memory, so keep it to one worker process and scale with threads.
+# every extra worker process would end up with its own separate cookbook
+from devdonalds import app
+
+__all__ = ['app']